@@ -1,18 +1,75 @@
 #Stage 2.5: Adapter - Convert Searcher Output to Scraper Input
 
 import json
-from typing import List, Dict, Any
+import os
+from itertools import chain
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import List, Dict, Any, Iterable, Iterator
 import hashlib
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    from w3lib.url import canonicalize_url
+except ImportError:
+    canonicalize_url = None
+
+try:
+    from xxhash import xxh3_64_intdigest
+except ImportError:
+    xxh3_64_intdigest = None
+
+# Tracking query parameters that never change page content (plus any utm_*)
+URL_STRIP_PARAMS = frozenset({"utm_source", "utm_medium", "utm_campaign", "gclid", "fbclid"})
+
 def generate_url_id(url: str, sub_question_id: str) -> str:
-    """Generate a unique ID for a URL"""
-    combined = f"{sub_question_id}_{url}"
-    return hashlib.sha256(combined.encode()).hexdigest()[:12]
+    """Generate a unique ID for a URL (non-cryptographic, 12 hex chars)"""
+    combined = f"{sub_question_id}_{url}".encode()
+    if blake3:
+        return blake3(combined).hexdigest(length=6)
+    return hashlib.sha256(combined).hexdigest()[:12]
+
+
+def canonical_url(url: str) -> str:
+    """
+    Canonical form of a URL for deduplication only
+    
+    Ignores scheme, host case, trailing slashes, fragments, query parameter
+    order and tracking parameters, so http://x.com/?utm_source=rss and
+    https://x.com map to the same key
+    """
+    if canonicalize_url:
+        url = canonicalize_url(url)
+    parts = urlsplit(url)
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in URL_STRIP_PARAMS and not k.startswith("utm_")
+    ))
+    return urlunsplit(("", parts.netloc.lower(), parts.path.rstrip("/"), query, ""))
 
 
-def convert_searcher_to_scraper_format(search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def url_key(url: str) -> int:
+    """64-bit key for the URL dedup set (builtin hash is stable within one run)"""
+    data = url.encode()
+    return xxh3_64_intdigest(data) if xxh3_64_intdigest else hash(data)
+
+
+def convert_searcher_to_scraper_format(search_results: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
     """
-    Convert searcher output format to scraper input format
+    Convert searcher output format to scraper input format, yielding one task at a time
     
     Searcher output format (per sub-question):
     {
@@ -39,8 +96,7 @@ def convert_searcher_to_scraper_format(search_results: List[Dict[str, Any]]) ->
         }
     ]
     """
-    scraper_tasks = []
-    url_seen = set()  # Deduplicate across sub-questions
+    url_seen: set[int] = set()  # Deduplicate across sub-questions
     
     for sub_question_result in search_results:
         sub_q_id = sub_question_result.get("sub_question_id", "unknown")
@@ -51,35 +107,56 @@ def convert_searcher_to_scraper_format(search_results: List[Dict[str, Any]]) ->
             url = result.get("url")
             
             # Skip if no URL or already processed
-            if not url or url in url_seen:
+            if not url:
                 continue
             
-            url_seen.add(url)
+            # Dedup on the canonical form; the task keeps the original URL
+            try:
+                key = url_key(canonical_url(url))
+            except ValueError:  # malformed URL (bad port, broken IPv6 host): dedup on the raw string
+                key = url_key(url)
+            if key in url_seen:
+                continue
+            url_seen.add(key)
             
             # Generate unique ID
             task_id = generate_url_id(url, sub_q_id)
             
-            # Build scraper task
+            candidate_meta = {
+                "sub_question_text": sub_q_text,
+                "title": result.get("title"),
+                "snippet": result.get("snippet"),
+                "rank_score": result.get("rank_score"),
+                "relevance_score": result.get("relevance_score"),
+                "domain_score": result.get("domain_score"),
+                "engine": result.get("engine"),
+                "date": result.get("date"),
+                "rank_in_results": idx + 1
+            }
+            
+            # Build scraper task (missing fields are omitted, not written as null)
             scraper_task = {
                 "id": task_id,
                 "url": url,
                 "sub_question": sub_q_id,
-                "meta": {
-                    "sub_question_text": sub_q_text,
-                    "title": result.get("title"),
-                    "snippet": result.get("snippet"),
-                    "rank_score": result.get("rank_score"),
-                    "relevance_score": result.get("relevance_score"),
-                    "domain_score": result.get("domain_score"),
-                    "engine": result.get("engine"),
-                    "date": result.get("date"),
-                    "rank_in_results": idx + 1
-                }
+                "meta": {k: v for k, v in candidate_meta.items() if v is not None}
             }
             
-            scraper_tasks.append(scraper_task)
+            yield scraper_task
+
+
+def load_search_results(input_file: str) -> List[Dict[str, Any]]:
+    """
+    Load searcher output: JSON Lines (one sub-question result per line,
+    as written by searcher.py) or a single JSON array
+    """
+    if not input_file.endswith(".jsonl"):
+        with open(input_file, "r") as f:
+            return json.load(f)
     
-    return scraper_tasks
+    loads = orjson.loads if orjson else json.loads
+    with open(input_file, "rb") as f:
+        return [loads(line) for line in f if line.strip()]
 
 
 def filter_top_n_per_subquestion(
@@ -103,12 +180,40 @@ def filter_top_n_per_subquestion(
     return filtered
 
 
-def save_scraper_input(scraper_tasks: List[Dict[str, Any]], output_file: str = "scraper_input.json"):
-    """Save scraper tasks to JSON file"""
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(scraper_tasks, f, indent=2, ensure_ascii=False)
+def _encode_task(task: Dict[str, Any]) -> bytes:
+    """Encode one task as an indented JSON array element"""
+    if orjson:
+        encoded = orjson.dumps(task, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    else:
+        encoded = json.dumps(task, indent=2, ensure_ascii=False).encode("utf-8")
+    return b"  " + encoded.replace(b"\n", b"\n  ")
+
+
+def save_scraper_input(scraper_tasks: Iterable[Dict[str, Any]], output_file: str = "scraper_input.json"):
+    """
+    Stream scraper tasks to a JSON array file without materializing the list
+    
+    A ".msgpack" output file is written as MessagePack instead (needs msgspec)
+    """
+    if output_file.endswith(".msgpack"):
+        if msgspec is None:
+            raise ImportError("msgspec is required to write .msgpack scraper input")
+        scraper_tasks = list(scraper_tasks)
+        with open(output_file, "wb") as f:
+            f.write(msgspec.msgpack.Encoder().encode(scraper_tasks))
+        print(f"✓ Saved {len(scraper_tasks)} scraper tasks to {output_file}")
+        return output_file
     
-    print(f"✓ Saved {len(scraper_tasks)} scraper tasks to {output_file}")
+    count = 0
+    with open(output_file, "wb") as f:
+        f.write(b"[")
+        for task in scraper_tasks:
+            f.write(b",\n" if count else b"\n")
+            f.write(_encode_task(task))
+            count += 1
+        f.write(b"\n]" if count else b"]")
+    
+    print(f"✓ Saved {count} scraper tasks to {output_file}")
     return output_file
 
 
@@ -118,15 +223,17 @@ def save_scraper_input(scraper_tasks: List[Dict[str, Any]], output_file: str = "
 def main():
     """
     Example usage:
-    1. Load searcher results
+    1. Load searcher results (search_results.jsonl, else search_results.json)
     2. Optionally filter top N
     3. Convert to scraper format
     4. Save for scraper
     """
     
-    # Load searcher results
-    with open("search_results.json", "r") as f:
-        search_results = json.load(f)
+    # Load searcher results (current JSON Lines output, else the older JSON array)
+    input_file = "search_results.jsonl"
+    if not os.path.exists(input_file):
+        input_file = "search_results.json"
+    search_results = load_search_results(input_file)
     
     print(f"Loaded {len(search_results)} sub-question results")
     
@@ -141,15 +248,15 @@ def main():
     filtered_total = sum(len(sq.get("results", [])) for sq in filtered_results)
     print(f"After filtering to top {TOP_N}: {filtered_total} URLs")
     
-    # Convert to scraper format
+    # Convert to scraper format (lazily; tasks are streamed to disk)
     scraper_tasks = convert_searcher_to_scraper_format(filtered_results)
     
-    print(f"\nConverted to {len(scraper_tasks)} unique scraper tasks")
-    
     # Show example task
-    if scraper_tasks:
+    first_task = next(scraper_tasks, None)
+    if first_task:
         print("\nExample scraper task:")
-        print(json.dumps(scraper_tasks[0], indent=2))
+        print(json.dumps(first_task, indent=2))
+        scraper_tasks = chain([first_task], scraper_tasks)
     
     # Save for scraper
     output_file = save_scraper_input(scraper_tasks, "scraper_input.json")
@@ -157,7 +264,7 @@ def main():
     print(f"\n✓ Ready for scraper! Run:")
     print(f"  python ultra_scraper.py --input {output_file} --outdir data/")
     
-    return scraper_tasks
+    return output_file
 
 
 if __name__ == "__main__":
@@ -1,5 +1,7 @@
 from google import genai
+from google.genai import types
 from dotenv import load_dotenv
+from string import Template
 import os
 
 # -------------------------------
@@ -30,154 +32,164 @@ client = init_client(API_KEY)
 # -------------------------------
 # PROMPT HELPERS
 # -------------------------------
+# Static prompt text is built once at import; only the query is substituted
 
-def build_analysis_prompt(query: str) -> str:
-    return f"""
+ANALYSIS_TEMPLATE = Template("""
 You are a query analysis system. Your job is to extract structured information from user research queries.
 
 Analyze the following user query and extract key parameters. Be precise and objective.
 
-USER QUERY: {query}
+USER QUERY: $query
 
 Respond ONLY with valid JSON:
 
-{{
+{
   "primary_intent": "<information_seeking | causal_analysis | comparison | how_to | trend_analysis | definition | data_request | solution_seeking>",
   
-  "scope": {{
+  "scope": {
     "breadth": "<broad_overview | focused_aspect | deep_dive>",
     "depth_level": "<introductory | intermediate | expert>",
     "specificity_score": "<1-5>"
-  }},
+  },
   
   "domains": ["<list domains>"],
   
-  "constraints": {{
-    "temporal": {{
+  "constraints": {
+    "temporal": {
       "has_constraint": <true|false>,
       "type": "<historical | current | future | specific_period | null>",
       "details": "<string or null>"
-    }},
-    "geographic": {{
+    },
+    "geographic": {
       "has_constraint": <true|false>,
       "locations": ["<list or empty>"]
-    }},
+    },
     "domain_specific": ["<list or empty>"]
-  }},
+  },
   
-  "implicit_requirements": {{
+  "implicit_requirements": {
     "needs_data": <true|false>,
     "needs_mechanisms": <true|false>,
     "needs_examples": <true|false>,
     "needs_comparisons": <true|false>,
     "needs_step_by_step": <true|false>,
     "needs_recommendations": <true|false>
-  }},
+  },
   
-  "entities": {{
+  "entities": {
     "primary_entities": ["<list>"],
     "secondary_entities": ["<list>"]
-  }},
+  },
   
   "ambiguities": ["<list>"],
   
   "complexity_score": "<1-5>"
-}}
-"""
+}
+""")
+
 
+def build_analysis_prompt(query: str) -> str:
+    return ANALYSIS_TEMPLATE.substitute(query=query)
 
-def build_planning_prompt(query: str, analysis_json: str) -> str:
-    return f"""
-You are a research planning system. Create an actionable research plan.
 
-USER QUERY: {query}
+PLANNING_TEMPLATE = Template("""
+You are a research planning system. Create an actionable research plan
+using the query analysis you produced above.
 
-QUERY ANALYSIS:
-{analysis_json}
+USER QUERY: $query
 
 Output ONLY valid JSON:
 
-{{
-  "research_strategy": {{
+{
+  "research_strategy": {
     "approach": "<sequential_deep_dive | parallel_broad_search | hierarchical_breakdown | comparative_analysis>",
     "estimated_complexity": "<low | medium | high>",
     "estimated_search_count": <3-15>
-  }},
+  },
   
   "sub_questions": [
-    {{
+    {
       "id": "q1",
       "question": "<sub-question>",
       "rationale": "<why needed>",
       "priority": "<critical | high | medium | low>",
       "dependencies": [],
       
-      "search_strategy": {{
+      "search_strategy": {
         "queries": [
           "<query 1>",
           "<query 2>",
           "<query 3>"
         ],
-        "query_variants": {{
+        "query_variants": {
           "academic": "<academic phrasing>",
           "general": "<simple phrasing>",
           "temporal": "<time-specific phrasing>"
-        }},
+        },
         "preferred_source_types": ["<list>"],
         "date_filter": "<recent_only | last_year | last_5_years | no_filter | specific_period>",
         "geographic_filter": "<region or global>"
-      }},
+      },
       
-      "expected_information": {{
+      "expected_information": {
         "type": ["<definitions | mechanisms | data | examples | comparisons>"],
         "completeness_criteria": "<how to know it's complete>",
         "minimum_sources": <number>
-      }}
-    }}
+      }
+    }
   ],
   
-  "execution_plan": {{
-    "phase_1": {{
+  "execution_plan": {
+    "phase_1": {
       "description": "Foundation gathering",
       "questions": ["q1"],
       "can_parallelize": false
-    }},
-    "phase_2": {{
+    },
+    "phase_2": {
       "description": "Deep dive",
       "questions": ["q2", "q3"],
       "can_parallelize": true
-    }},
-    "phase_3": {{
+    },
+    "phase_3": {
       "description": "Verification and synthesis",
       "questions": ["q4"],
       "can_parallelize": true
-    }}
-  }},
+    }
+  },
   
-  "success_criteria": {{
+  "success_criteria": {
     "minimum_requirements": ["<list>"],
     "quality_indicators": ["<list>"],
     "stopping_conditions": "<condition>"
-  }},
+  },
   
-  "synthesis_guidance": {{
+  "synthesis_guidance": {
     "final_answer_structure": "<structure>",
     "key_points_to_address": ["<list>"],
     "caveats_to_include": ["<list>"]
-  }}
-}}
-"""
+  }
+}
+""")
+
+
+def build_planning_prompt(query: str) -> str:
+    return PLANNING_TEMPLATE.substitute(query=query)
 
 
 # -------------------------------
 # MODEL CALLING FUNCTION
 # -------------------------------
-def run_model(prompt: str):
+def start_chat():
+    """One chat session for both stages, with JSON-only responses"""
+    return client.chats.create(
+        model=MODEL_NAME,
+        config=types.GenerateContentConfig(response_mime_type="application/json")
+    )
+
+
+def run_model(chat, prompt: str):
     try:
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt
-        )
+        response = chat.send_message(prompt)
         return response.text
     except Exception as e:
         print(f"Model error: {e}")
@@ -188,17 +200,19 @@ def run_model(prompt: str):
 # MAIN EXECUTION
 # -------------------------------
 
+chat = start_chat()
+
 # Step 1: Analyze Query
 analysis_prompt = build_analysis_prompt(query)
-analysis_result = run_model(analysis_prompt)
+analysis_result = run_model(chat, analysis_prompt)
 
 if not analysis_result:
     print("Failed to generate analysis.")
     exit()
 
-# Step 2: Create Research Plan
-planning_prompt = build_planning_prompt(query, analysis_result)
-plan = run_model(planning_prompt)
+# Step 2: Create Research Plan (the analysis is already in the chat history)
+planning_prompt = build_planning_prompt(query)
+plan = run_model(chat, planning_prompt)
 
 # Output
 print("===== QUERY ANALYSIS =====")
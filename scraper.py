@@ -8,33 +8,111 @@ Key fixes:
 """
 import asyncio
 import aiohttp
+import multiprocessing
 import aiofiles
 import os
+import gzip
 import time
 import json
 import hashlib
 import sqlite3
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache, lru_cache
+from io import BytesIO
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 
-# Optional dependencies
+# Async DNS resolution for the shared connector (aiohttp.AsyncResolver needs aiodns)
 try:
-    import trafilatura
-except Exception:
-    trafilatura = None
+    import aiodns
+except ImportError:
+    aiodns = None
 
+# Async file writes: aiofile submits through one shared caio context per
+# event loop (io_uring / kernel AIO on Linux); aiofiles is the fallback
 try:
-    from readability import Document as ReadabilityDocument
-except Exception:
-    ReadabilityDocument = None
+    from aiofile import async_open
+except ImportError:
+    async_open = None
 
-# PDF extraction
 try:
-    from pdfminer.high_level import extract_text as pdf_extract_text
-except Exception:
-    pdf_extract_text = None
+    import orjson
+except ImportError:
+    orjson = None
+
+# Faster event loop (libuv); asyncio's default loop is the fallback
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Fast non-cryptographic hashing for file names and fingerprints
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+
+# Heavy optional dependencies (trafilatura, selectolax, lxml, pdfminer) and
+# the BeautifulSoup last-resort parser are
+# imported on first use, so startup stays fast and extraction workers only
+# load what they need
+@cache
+def get_trafilatura():
+    """trafilatura module, or None"""
+    try:
+        import trafilatura
+    except Exception:
+        return None
+    return trafilatura
+
+@cache
+def get_html_parser():
+    """selectolax parser class (C backend), or None"""
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborHTMLParser
+    except ImportError:
+        pass
+    try:
+        from selectolax.parser import HTMLParser
+        return HTMLParser
+    except ImportError:
+        return None
+
+@cache
+def get_lxml():
+    """(lxml.html, lxml.etree, UTF-8 HTML parser), or None"""
+    try:
+        import lxml.html
+        from lxml import etree
+    except ImportError:
+        return None
+    return lxml.html, etree, lxml.html.HTMLParser(encoding="utf-8")
+
+@cache
+def get_bs4():
+    """BeautifulSoup class (pure-Python last resort), or None"""
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        return None
+    return BeautifulSoup
+
+@cache
+def get_pdf_extract_text():
+    """pdfminer's extract_text, or None"""
+    try:
+        from pdfminer.high_level import extract_text
+    except Exception:
+        return None
+    return extract_text
 
 # -----------------------
 # CONFIG
@@ -42,12 +120,18 @@ except Exception:
 RAW_STORAGE_DIR = "data/raw"
 CLEAN_STORAGE_DIR = "data/clean"
 DB_FILE = "scraper.db"
-MAX_CONCURRENT = 5                     # Concurrent requests
+MAX_CONCURRENT = 50                    # Concurrent requests (all hosts)
+HOST_CONCURRENCY = 2                   # Concurrent requests per host
 REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=20)
 USER_AGENT = "AutonomousResearchAgent/1.0 (+https://example.org)"
 CHUNK_SIZE = 2000
 MAX_RETRIES = 2
-DELAY_BETWEEN_REQUESTS = 0.5          # seconds
+DELAY_BETWEEN_REQUESTS = 0.5          # seconds, per host
+DB_BATCH_SIZE = 32                     # Rows buffered before a DB commit
+STORE_RAW_ON_SUCCESS = False           # Keep raw HTML/PDF even when extraction works
+
+# Elements dropped before falling back to raw DOM text
+FALLBACK_STRIP_TAGS = ["script", "style", "noscript", "nav", "footer", "aside"]
 
 # Paywall detection keywords
 PAYWALL_KEYWORDS = [
@@ -55,16 +139,42 @@ PAYWALL_KEYWORDS = [
     "sign up to continue", "create an account", "login to read"
 ]
 
+def build_paywall_automaton():
+    """Build an Aho-Corasick automaton so all keywords are found in one scan"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for kw in PAYWALL_KEYWORDS:
+        automaton.add_word(kw, kw)
+    automaton.make_automaton()
+    return automaton
+
+PAYWALL_AUTOMATON = build_paywall_automaton()
+
 # -----------------------
 # STORAGE: SQLite
 # -----------------------
 db_lock = asyncio.Lock()
 
+INSERT_RAW_SQL = "INSERT OR REPLACE INTO raw_pages (id, url, fetched_at, content_type, path, http_status) VALUES (?,?,?,?,?,?)"
+INSERT_CLEAN_SQL = """INSERT OR REPLACE INTO cleaned_pages
+            (id, url, title, text_path, summary, lang, fingerprint, word_count)
+            VALUES (?,?,?,?,?,?,?,?)"""
+
+# Pending rows, written in batches by flush_db()
+raw_queue: List[tuple] = []
+clean_queue: List[tuple] = []
+
 def init_db():
     """Initialize SQLite database"""
     con = sqlite3.connect(DB_FILE, check_same_thread=False)
     cur = con.cursor()
     
+    # WAL + NORMAL sync: one fsync per checkpoint instead of per commit
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    
     cur.execute("""
     CREATE TABLE IF NOT EXISTS raw_pages (
         id TEXT PRIMARY KEY,
@@ -95,18 +205,102 @@ def init_db():
 # Initialize DB at module load
 DB = init_db()
 
+async def flush_db():
+    """Write all queued rows in one transaction"""
+    async with db_lock:
+        if not raw_queue and not clean_queue:
+            return
+        cur = DB.cursor()
+        if raw_queue:
+            cur.executemany(INSERT_RAW_SQL, raw_queue)
+        if clean_queue:
+            cur.executemany(INSERT_CLEAN_SQL, clean_queue)
+        DB.commit()
+        raw_queue.clear()
+        clean_queue.clear()
+
+# -----------------------
+# HTTP SESSION
+# -----------------------
+_session: Optional[aiohttp.ClientSession] = None
+_session_lock = asyncio.Lock()
+
+def make_connector(limit: int = MAX_CONCURRENT, limit_per_host: int = HOST_CONCURRENCY) -> aiohttp.TCPConnector:
+    """Pooled connector with DNS caching (async resolver when aiodns is present)"""
+    return aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=300,
+        use_dns_cache=True,
+        enable_cleanup_closed=True,
+        resolver=aiohttp.AsyncResolver() if aiodns else None
+    )
+
+async def get_session() -> aiohttp.ClientSession:
+    """Lazily create the session shared by every request in this process"""
+    global _session
+    async with _session_lock:
+        if _session is None or _session.closed:
+            _session = aiohttp.ClientSession(
+                connector=make_connector(),
+                timeout=aiohttp.ClientTimeout(total=30, connect=10)
+            )
+    return _session
+
+async def close_session():
+    """Close the shared session (call before the event loop exits)"""
+    global _session
+    async with _session_lock:
+        if _session is not None:
+            await _session.close()
+            _session = None
+
+# -----------------------
+# EXTRACTION POOL
+# -----------------------
+# Parsing holds the GIL for tens of ms per page, so it runs in worker processes
+EXTRACT_POOL: Optional[ProcessPoolExecutor] = None
+
+def get_extract_pool() -> ProcessPoolExecutor:
+    """Lazily start the extraction worker pool"""
+    global EXTRACT_POOL
+    if EXTRACT_POOL is None:
+        # forkserver: workers fork from a clean server process, not from the event loop
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+        EXTRACT_POOL = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=ctx)
+    return EXTRACT_POOL
+
+def shutdown_extract_pool():
+    """Stop the extraction workers"""
+    global EXTRACT_POOL
+    if EXTRACT_POOL is not None:
+        EXTRACT_POOL.shutdown()
+        EXTRACT_POOL = None
+
 # -----------------------
 # UTILITIES
 # -----------------------
+@lru_cache(maxsize=8192)
 def safe_filename(url: str) -> str:
-    """Generate safe filename from URL"""
-    h = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+    """Generate safe filename from URL (memoized: raw and clean saves share it)"""
+    data = url.encode("utf-8")
+    h = blake3(data).hexdigest(length=8) if blake3 else hashlib.sha256(data).hexdigest()[:16]
     parsed = urlparse(url)
     name = (parsed.path.strip("/").replace("/", "_") or "root")[:80]
     # Remove special chars
     name = "".join(c for c in name if c.isalnum() or c in "-_")
     return f"{parsed.netloc}_{name}_{h}"
 
+async def write_file(path: str, data: bytes):
+    """Write bytes to disk without blocking the event loop"""
+    if async_open:
+        async with async_open(path, "wb") as f:
+            await f.write(data)
+    else:
+        async with aiofiles.open(path, "wb") as f:
+            await f.write(data)
+
 def ensure_dirs():
     """Create necessary directories"""
     os.makedirs(RAW_STORAGE_DIR, exist_ok=True)
@@ -119,8 +313,11 @@ def is_pdf_url(url: str, content_type: Optional[str] = None) -> bool:
     return url.lower().endswith(".pdf")
 
 def fingerprint_text(text: str) -> str:
-    """Generate fingerprint of text content"""
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    """Generate fingerprint of text content (dedup key, not cryptographic)"""
+    data = text.encode("utf-8")
+    if blake3:
+        return blake3(data, max_threads=blake3.AUTO).hexdigest(length=16)
+    return hashlib.sha256(data).hexdigest()[:32]
 
 # -----------------------
 # FETCH
@@ -161,82 +358,83 @@ async def fetch_url(session: aiohttp.ClientSession, url: str) -> Tuple[Optional[
 # TEXT EXTRACTION
 # -----------------------
 def extract_text_from_html(html_bytes: bytes, url: str) -> Tuple[str, Dict[str, Any]]:
-    """Extract clean text from HTML"""
+    """Extract clean text from HTML: trafilatura, else text of a single parsed DOM (selectolax, lxml or BeautifulSoup)"""
     html = html_bytes.decode("utf-8", errors="ignore")
     meta = {"title": None, "lang": None}
-    
-    # Try trafilatura first (best results)
+    tree = None
+    HTMLParser = get_html_parser()
+    lxml_parts = None if HTMLParser else get_lxml()
+    BeautifulSoup = None if HTMLParser or lxml_parts else get_bs4()
+    
+    if HTMLParser is not None:
+        tree = HTMLParser(html)
+        title_node = tree.css_first("title")
+        if title_node:
+            meta["title"] = title_node.text(strip=True) or None
+        html_node = tree.css_first("html")
+        if html_node:
+            meta["lang"] = html_node.attributes.get("lang")
+    elif lxml_parts is not None:
+        lxml_html, etree, utf8_parser = lxml_parts
+        try:
+            # Bytes + explicit encoding: str input with an XML declaration is rejected
+            tree = lxml_html.fromstring(html.encode("utf-8"), parser=utf8_parser)
+        except (etree.ParserError, ValueError):
+            tree = None
+        if tree is not None:
+            meta["title"] = (tree.findtext(".//title") or "").strip() or None
+            meta["lang"] = tree.get("lang")
+    elif BeautifulSoup is not None:
+        tree = BeautifulSoup(html, "html.parser")
+        if tree.title and tree.title.string:
+            meta["title"] = tree.title.string.strip() or None
+        if tree.html:
+            meta["lang"] = tree.html.get("lang")
+    
+    # Try trafilatura first (best results; lxml-backed)
+    trafilatura = get_trafilatura()
     if trafilatura:
         try:
             extracted = trafilatura.extract(
                 html,
                 include_comments=False,
                 include_tables=True,
-                include_links=False
+                include_links=False,
+                favor_precision=True
             )
             
             if extracted and len(extracted.strip()) > 100:
-                # Get title separately
-                soup = BeautifulSoup(html, "html.parser")
-                if soup.title and soup.title.string:
-                    meta["title"] = soup.title.string.strip()
-                if soup.html:
-                    meta["lang"] = soup.html.get("lang")
-                
                 return extracted, meta
         except Exception:
             pass
     
-    # Fallback to readability
-    if ReadabilityDocument:
-        try:
-            doc = ReadabilityDocument(html)
-            content_html = doc.summary()
-            title = doc.title()
-            
-            soup = BeautifulSoup(content_html, "html.parser")
-            text = soup.get_text(separator="\n", strip=True)
-            
-            meta["title"] = title
-            
-            # Get lang from original HTML
-            soup_full = BeautifulSoup(html, "html.parser")
-            if soup_full.html:
-                meta["lang"] = soup_full.html.get("lang")
-            
-            return text, meta
-        except Exception:
-            pass
-    
-    # Last resort: BeautifulSoup only
-    soup = BeautifulSoup(html, "html.parser")
-    
-    # Remove unwanted elements
-    for tag in soup(["script", "style", "noscript", "nav", "footer", "aside"]):
-        tag.decompose()
-    
-    text = soup.get_text(separator="\n", strip=True)
-    
-    if soup.title and soup.title.string:
-        meta["title"] = soup.title.string.strip()
-    if soup.html:
-        meta["lang"] = soup.html.get("lang")
+    if tree is None:
+        return "", meta
+    
+    # Fallback: plain DOM text, reusing the tree parsed above
+    if HTMLParser is not None:
+        tree.strip_tags(FALLBACK_STRIP_TAGS)
+        root = tree.body or tree.root
+        text = root.text(separator="\n", strip=True) if root is not None else ""
+    elif lxml_parts is not None:
+        etree.strip_elements(tree, *FALLBACK_STRIP_TAGS, with_tail=False)
+        text = "\n".join(chunk.strip() for chunk in tree.itertext() if chunk.strip())
+    else:
+        for tag in tree(FALLBACK_STRIP_TAGS):
+            tag.decompose()
+        text = tree.get_text(separator="\n", strip=True)
     
     return text, meta
 
 def extract_text_from_pdf(raw_bytes: bytes) -> Tuple[str, Dict[str, Any]]:
     """Extract text from PDF"""
+    pdf_extract_text = get_pdf_extract_text()
     if not pdf_extract_text:
         return "", {}
     
     try:
-        import tempfile
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(raw_bytes)
-            tmp_path = tmp.name
-        
-        text = pdf_extract_text(tmp_path)
-        os.unlink(tmp_path)
+        # pdfminer reads file-like objects; no temp file round-trip needed
+        text = pdf_extract_text(BytesIO(raw_bytes))
         
         return text, {"title": None, "lang": None}
     except Exception:
@@ -252,12 +450,17 @@ def detect_paywall(text: str) -> bool:
     
     text_lower = text.lower()
     
-    # Check for paywall keywords
-    keyword_count = sum(1 for kw in PAYWALL_KEYWORDS if kw in text_lower)
-    
-    # If multiple keywords found, likely paywall
-    if keyword_count >= 2:
-        return True
+    # Check for paywall keywords; if multiple distinct ones found, likely paywall
+    if PAYWALL_AUTOMATON is not None:
+        found = set()
+        for _, kw in PAYWALL_AUTOMATON.iter(text_lower):
+            found.add(kw)
+            if len(found) >= 2:
+                return True
+    else:
+        keyword_count = sum(1 for kw in PAYWALL_KEYWORDS if kw in text_lower)
+        if keyword_count >= 2:
+            return True
     
     # Check if text is suspiciously short
     if len(text.strip()) < 500 and "subscribe" in text_lower:
@@ -268,46 +471,35 @@ def detect_paywall(text: str) -> bool:
 # -----------------------
 # STORAGE
 # -----------------------
-async def save_raw(url: str, raw: bytes, content_type: str, status: int) -> str:
-    """Save raw content"""
+async def save_raw(url: str, raw: bytes, content_type: str, status: int, store: bool = True) -> Optional[str]:
+    """Record a fetched page; write it to disk gzipped only when store is set"""
     fname = safe_filename(url)
-    ext = ".pdf" if is_pdf_url(url, content_type) else ".html"
-    path = os.path.join(RAW_STORAGE_DIR, fname + ext)
+    path = None
     
-    async with aiofiles.open(path, "wb") as f:
-        await f.write(raw or b"")
+    if store:
+        ext = ".pdf" if is_pdf_url(url, content_type) else ".html"
+        path = os.path.join(RAW_STORAGE_DIR, fname + ext + ".gz")
+        await write_file(path, gzip.compress(raw or b"", compresslevel=1))
     
-    # Save to DB
-    async with db_lock:
-        cur = DB.cursor()
-        cur.execute(
-            "INSERT OR REPLACE INTO raw_pages (id, url, fetched_at, content_type, path, http_status) VALUES (?,?,?,?,?,?)",
-            (fname, url, time.time(), content_type, path, status)
-        )
-        DB.commit()
+    # Queue for DB
+    raw_queue.append((fname, url, time.time(), content_type, path, status))
+    if len(raw_queue) >= DB_BATCH_SIZE:
+        await flush_db()
     
     return path
 
-async def save_cleaned(id_: str, url: str, meta: Dict[str, Any], text: str, summary: Optional[str] = None):
-    """Save cleaned text"""
+async def save_cleaned(id_: str, url: str, meta: Dict[str, Any], text: str, fingerprint: str, summary: Optional[str] = None):
+    """Save cleaned text (fingerprint is computed once by the caller)"""
     fname = safe_filename(url) + ".txt"
     path = os.path.join(CLEAN_STORAGE_DIR, fname)
     
-    async with aiofiles.open(path, "w", encoding="utf-8") as f:
-        await f.write(text)
+    await write_file(path, text.encode("utf-8"))
     
-    fp = fingerprint_text(text)
     word_count = len(text.split())
     
-    async with db_lock:
-        cur = DB.cursor()
-        cur.execute(
-            """INSERT OR REPLACE INTO cleaned_pages
-            (id, url, title, text_path, summary, lang, fingerprint, word_count)
-            VALUES (?,?,?,?,?,?,?,?)""",
-            (id_, url, meta.get("title"), path, summary, meta.get("lang"), fp, word_count)
-        )
-        DB.commit()
+    clean_queue.append((id_, url, meta.get("title"), path, summary, meta.get("lang"), fingerprint, word_count))
+    if len(clean_queue) >= DB_BATCH_SIZE:
+        await flush_db()
     
     return path
 
@@ -347,15 +539,19 @@ async def scrape_single(session: aiohttp.ClientSession, task: Dict[str, Any]) ->
             result["notes"].append(f"fetch_failed_status:{status}")
             return result
         
-        # Save raw
-        raw_path = await save_raw(url, raw, content_type or "", status)
-        result["raw_path"] = raw_path
-        
-        # Extract text
+        # Extract text off the event loop
+        loop = asyncio.get_running_loop()
         if is_pdf_url(url, content_type):
-            text, meta = extract_text_from_pdf(raw)
+            text, meta = await loop.run_in_executor(get_extract_pool(), extract_text_from_pdf, raw)
         else:
-            text, meta = extract_text_from_html(raw, url)
+            text, meta = await loop.run_in_executor(get_extract_pool(), extract_text_from_html, raw, url)
+        
+        # Record raw page; keep the bytes on disk only if extraction failed
+        extracted = bool(text) and len(text.strip()) >= 100
+        result["raw_path"] = await save_raw(
+            url, raw, content_type or "", status,
+            store=STORE_RAW_ON_SUCCESS or not extracted
+        )
         
         # Check for paywall
         if detect_paywall(text):
@@ -363,11 +559,11 @@ async def scrape_single(session: aiohttp.ClientSession, task: Dict[str, Any]) ->
             result["notes"].append("paywall heuristics")
             # Still save what we got
             if text:
-                await save_cleaned(uid, url, meta, text)
+                await save_cleaned(uid, url, meta, text, fingerprint_text(text))
             return result
         
         # Check if extraction succeeded
-        if not text or len(text.strip()) < 100:
+        if not extracted:
             result["status"] = "extraction_failed"
             result["notes"].append(f"text_too_short:{len(text)}")
             return result
@@ -376,14 +572,15 @@ async def scrape_single(session: aiohttp.ClientSession, task: Dict[str, Any]) ->
         summary = text[:400].strip().replace("\n", " ") + "..." if len(text) > 400 else text[:200]
         
         # Save cleaned
-        clean_path = await save_cleaned(uid, url, meta, text, summary)
+        fp = fingerprint_text(text)
+        clean_path = await save_cleaned(uid, url, meta, text, fp, summary)
         
         result["clean_path"] = clean_path
         result["status"] = "ok"
         result["title"] = meta.get("title")
         result["lang"] = meta.get("lang")
         result["summary"] = summary
-        result["fingerprint"] = fingerprint_text(text)
+        result["fingerprint"] = fp
         
         return result
         
@@ -401,37 +598,78 @@ async def scrape_batch(tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     ensure_dirs()
     
-    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT, limit_per_host=2)
-    timeout = aiohttp.ClientTimeout(total=30, connect=10)
-    
-    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+    session = await get_session()
+    try:
         results = []
+        success_count = 0
         
-        # Process with semaphore for rate limiting
-        sem = asyncio.Semaphore(MAX_CONCURRENT)
+        # Producer/consumer: MAX_CONCURRENT workers pull from a small queue;
+        # only tasks for hosts already at HOST_CONCURRENCY are parked in
+        # per-host deques (drained by the workers on that host)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_CONCURRENT * 2)
+        host_active: Dict[str, int] = defaultdict(int)
+        host_pending: Dict[str, deque] = defaultdict(deque)
+        host_next: Dict[str, float] = {}
         
-        async def limited_scrape(task):
-            async with sem:
-                result = await scrape_single(session, task)
-                # Small delay between requests
-                await asyncio.sleep(DELAY_BETWEEN_REQUESTS)
-                return result
-        
-        # Create all tasks
-        scrape_tasks = [limited_scrape(task) for task in tasks]
-        
-        # Execute with progress
-        print(f"Scraping {len(tasks)} URLs...")
-        for i, coro in enumerate(asyncio.as_completed(scrape_tasks)):
-            result = await coro
+        async def fetch(host: str, task: Dict[str, Any]):
+            nonlocal success_count
+            # Reserve this host's next slot, then wait only for it
+            now = time.monotonic()
+            start = max(now, host_next.get(host, 0.0))
+            host_next[host] = start + DELAY_BETWEEN_REQUESTS
+            if start > now:
+                await asyncio.sleep(start - now)
+            result = await scrape_single(session, task)
+            
             results.append(result)
+            if result["status"] == "ok":
+                success_count += 1
             
             # Progress
-            if (i + 1) % 5 == 0 or (i + 1) == len(tasks):
-                success_count = sum(1 for r in results if r["status"] == "ok")
-                print(f"  Progress: {i+1}/{len(tasks)} | Success: {success_count}")
+            done = len(results)
+            if done % 5 == 0 or done == len(tasks):
+                print(f"  Progress: {done}/{len(tasks)} | Success: {success_count}")
+        
+        async def worker():
+            while (task := await queue.get()) is not None:
+                # Per-host politeness: a saturated host's task is parked for
+                # the workers already on that host, so this worker moves on to
+                # other hosts instead of holding a global slot while it waits
+                host = urlparse(task["url"]).netloc
+                if host_active[host] >= HOST_CONCURRENCY:
+                    host_pending[host].append(task)
+                    continue
+                
+                host_active[host] += 1
+                try:
+                    # Drain parked tasks before giving up the host slot
+                    while True:
+                        await fetch(host, task)
+                        if not host_pending[host]:
+                            break
+                        task = host_pending[host].popleft()
+                finally:
+                    host_active[host] -= 1
+        
+        print(f"Scraping {len(tasks)} URLs...")
+        num_workers = max(1, min(MAX_CONCURRENT, len(tasks)))
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(num_workers):
+                tg.create_task(worker())
+            for task in tasks:
+                await queue.put(task)
+            for _ in range(num_workers):
+                await queue.put(None)
         
         return results
+    finally:
+        # Rows queued before a failure or cancellation are still written
+        try:
+            await flush_db()
+        finally:
+            safe_filename.cache_clear()
+            await close_session()
+            shutdown_extract_pool()
 
 # -----------------------
 # CLI
@@ -440,10 +678,13 @@ if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="Ultra-Agent Scraper")
-    parser.add_argument("--input", required=True, help="JSON file with tasks")
+    parser.add_argument("--input", required=True, help="JSON (or .msgpack) file with tasks")
     parser.add_argument("--outdir", default="data", help="Output directory")
+    parser.add_argument("--store-raw", action="store_true", help="Keep gzipped raw pages for successful extractions too")
     args = parser.parse_args()
     
+    STORE_RAW_ON_SUCCESS = args.store_raw
+    
     # Update paths
     RAW_STORAGE_DIR = os.path.join(args.outdir, "raw")
     CLEAN_STORAGE_DIR = os.path.join(args.outdir, "clean")
@@ -452,19 +693,29 @@ if __name__ == "__main__":
     # Reinitialize DB with new path
     DB = init_db()
     
-    # Load tasks
-    with open(args.input, "r") as f:
-        tasks = json.load(f)
+    # Load tasks (JSON, or MessagePack from the bridge's .msgpack output)
+    if args.input.endswith(".msgpack"):
+        import msgspec
+        with open(args.input, "rb") as f:
+            tasks = msgspec.msgpack.decode(f.read())
+    else:
+        with open(args.input, "r") as f:
+            tasks = json.load(f)
     
     print(f"Loaded {len(tasks)} tasks from {args.input}")
     
     # Run scraper
-    results = asyncio.run(scrape_batch(tasks))
+    run = uvloop.run if uvloop else asyncio.run
+    results = run(scrape_batch(tasks))
     
     # Save results
     output_file = os.path.join(args.outdir, "scrape_results.json")
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=2)
+    if orjson:
+        with open(output_file, "wb") as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(output_file, "w") as f:
+            json.dump(results, f, indent=2)
     
     # Summary
     success = sum(1 for r in results if r["status"] == "ok")
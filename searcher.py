@@ -1,13 +1,53 @@
-import aiohttp
+import httpx
 import asyncio
+import heapq
+import re
+from dataclasses import asdict, dataclass, replace
+from functools import lru_cache
 from bs4 import BeautifulSoup
-from urllib.parse import quote
+from urllib.parse import quote, urlsplit
 import json
-from typing import List, Dict, Optional
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Dict, Optional, Tuple
 from planner import plan as plan_output
+from bridge_searcher_scrapper import canonical_url
 from dotenv import load_dotenv
 import os
 
+# Fast JSON (stdlib json is the fallback)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# HTTP/2 support for httpx (multiplexes all Tavily queries over one connection)
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+# Faster event loop (libuv); asyncio's default loop is the fallback
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Vectorized scoring and top-k selection; plain Python lists are the fallback
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# TF-IDF relevance scoring; keyword matching is the fallback
+try:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+except ImportError:
+    TfidfVectorizer = None
+
+logger = logging.getLogger(__name__)
+
 # ==========================
 # CONFIG
 # ==========================
@@ -15,6 +55,19 @@ load_dotenv()
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 TAVILY_URL = "https://api.tavily.com/search"
 
+SEARCH_CONCURRENCY = 16                # Concurrent queries across the whole run
+SEARCH_RETRIES = 2                     # Retries on connection errors / 429 / 5xx
+RETRY_BACKOFF = 0.2                    # seconds, doubled per attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+TAVILY_TIMEOUT = 15                    # seconds per Tavily request
+DDG_TIMEOUT = 10                       # seconds per DuckDuckGo request
+
+# Seconds per query, counted once it holds a concurrency slot. Sized to fit
+# every Tavily attempt *and* the DuckDuckGo fallback (with backoff sleeps),
+# so a hanging Tavily cannot use up the budget before DuckDuckGo is tried.
+_BACKOFF_TOTAL = RETRY_BACKOFF * (2 ** SEARCH_RETRIES - 1)
+QUERY_TIMEOUT = (SEARCH_RETRIES + 1) * (TAVILY_TIMEOUT + DDG_TIMEOUT) + 2 * _BACKOFF_TOTAL + 5
+
 HEADERS = {
     "User-Agent": "ResearchAgent/1.0 (+https://example.com)"
 }
@@ -32,50 +85,206 @@ BAD_DOMAINS = [
     "forbes.com/sites", "answers.yahoo", "ehow.com"
 ]
 
+# Host patterns are matched as exact runs of dot-separated labels;
+# patterns containing a path are matched as substrings of the URL
+GOOD_HOSTS = frozenset(d for d in GOOD_DOMAINS if "/" not in d)
+BAD_HOSTS = frozenset(d for d in BAD_DOMAINS if "/" not in d)
+GOOD_PATH_PATTERNS = tuple(d for d in GOOD_DOMAINS if "/" in d)
+BAD_PATH_PATTERNS = tuple(d for d in BAD_DOMAINS if "/" in d)
+
+
+# ==========================
+# RESULT ROWS
+# ==========================
+@dataclass(slots=True)
+class SearchResult:
+    """One search hit; scores are filled in by rank_results"""
+    url: str
+    title: str
+    snippet: str
+    engine: str
+    date: Optional[str] = None
+    relevance_score: float = 0.0
+    domain_score: float = 0.0
+    rank_score: float = 0.0
+
+
+# ==========================
+# LOGGING
+# ==========================
+def setup_logging(level: int = logging.INFO) -> QueueListener:
+    """
+    Send log records through a queue to a background listener thread, so
+    the event loop never blocks writing to the terminal
+    
+    level applies to this module's logger only; other libraries (httpx logs
+    every request at INFO) keep the root logger's WARNING threshold.
+    
+    Returns the started listener; stop it on exit to flush pending records.
+    """
+    log_queue = queue.SimpleQueue()
+    
+    # QueueHandler formats records before enqueueing them; the listener's
+    # handler just writes the finished message
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    
+    logging.basicConfig(handlers=[queue_handler])
+    logger.setLevel(level)
+    listener = QueueListener(log_queue, logging.StreamHandler())
+    listener.start()
+    return listener
+
 
 # ==========================
 # UTILITY FUNCTIONS
 # ==========================
+@lru_cache(maxsize=4096)
+def _host_quality(host: str) -> float:
+    """Score a (lowercase) host name against the domain lists (many results share a host)"""
+    labels = host.split(".")
+    
+    # Every contiguous run of labels: "www.bls.gov" -> "bls.gov", "gov", ...
+    n = len(labels)
+    host_parts = {".".join(labels[i:j]) for i in range(n) for j in range(i + 1, n + 1)}
+    
+    if not GOOD_HOSTS.isdisjoint(host_parts):
+        return 0.3
+    
+    if not BAD_HOSTS.isdisjoint(host_parts):
+        return -0.2
+    
+    return 0.0
+
+
 def domain_quality(url: str) -> float:
-    """Score URL based on domain reputation"""
+    """Score URL based on domain reputation (0.0 for malformed URLs)"""
+    try:
+        # hostname drops userinfo and port and is already lowercased
+        host = urlsplit(url).hostname or ""
+    except ValueError:  # malformed URL (broken IPv6 host, ...)
+        return 0.0
+    host_score = _host_quality(host)
     url_lower = url.lower()
     
-    for good in GOOD_DOMAINS:
-        if good in url_lower:
-            return 0.3
+    if host_score > 0 or any(p in url_lower for p in GOOD_PATH_PATTERNS):
+        return 0.3
     
-    for bad in BAD_DOMAINS:
-        if bad in url_lower:
-            return -0.2
+    if host_score < 0 or any(p in url_lower for p in BAD_PATH_PATTERNS):
+        return -0.2
     
     return 0.0
 
 
-def relevance_score(query: str, title: str, snippet: str) -> float:
-    """Calculate relevance score based on keyword matching"""
-    query_words = set(query.lower().split())
-    text = (title + " " + snippet).lower()
+_tokenize = re.compile(r"\w+").findall
+
+
+def prep_query(query: str) -> frozenset:
+    """Tokenize a query once; the same sub-question is scored against many results"""
+    return frozenset(_tokenize(query.lower()))
+
+
+def relevance_score_prepped(query_words: frozenset, title: str, snippet: str) -> float:
+    """Calculate relevance score based on whole-word keyword matching against prep_query tokens"""
+    text_words = frozenset(_tokenize((title + " " + snippet).lower()))
     
-    match_count = sum(1 for word in query_words if word in text)
+    match_count = len(query_words & text_words)
     match_ratio = match_count / max(len(query_words), 1)
     
     # Base score + bonus for matches
     return min(1.0, 0.4 + (match_ratio * 0.6))
 
 
+def relevance_score(query: str, title: str, snippet: str) -> float:
+    """Calculate relevance score based on whole-word keyword matching"""
+    return relevance_score_prepped(prep_query(query), title, snippet)
+
+
+async def request_with_retries(client: httpx.AsyncClient, method: str, url: str, parse, **kwargs) -> Tuple[int, object]:
+    """
+    Send a request, retrying connection errors, timeouts and 429/5xx
+    responses with exponential backoff
+    
+    Returns (status, parse(response)) for 200 responses, (status, None) otherwise;
+    the last exception is raised once retries are exhausted
+    """
+    for attempt in range(SEARCH_RETRIES + 1):
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            if attempt == SEARCH_RETRIES:
+                raise
+        else:
+            status = resp.status_code
+            if status == 200:
+                return status, parse(resp)
+            if status not in RETRY_STATUSES or attempt == SEARCH_RETRIES:
+                return status, None
+        
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+
+def response_json(resp: httpx.Response):
+    """Decode a JSON response body (orjson straight from the bytes when installed)"""
+    if orjson:
+        return orjson.loads(resp.content)
+    return resp.json()
+
+
+def tfidf_relevance(queries: List[str], result_lists: List[List[SearchResult]]):
+    """
+    Relevance of every result to its own query, from one TF-IDF fit over all
+    queries and results, scaled per query (best match = 1.0) and mapped onto
+    relevance_score's 0.4-1.0 range
+    
+    Vocabulary and IDF are built once for the whole run; each query is then
+    scored against its own slice of result rows with one sparse product.
+    
+    Returns one score array per query, or None when scikit-learn is missing
+    or the texts have no usable terms
+    """
+    if TfidfVectorizer is None or not queries:
+        return None
+    
+    docs = [result.title + " " + result.snippet for results in result_lists for result in results]
+    try:
+        matrix = TfidfVectorizer(lowercase=True, ngram_range=(1, 2)).fit_transform([*queries, *docs])
+    except ValueError:  # empty vocabulary
+        return None
+    
+    scores = []
+    start = len(queries)
+    for i, results in enumerate(result_lists):
+        end = start + len(results)
+        # Rows are L2-normalized, so the dot product is the cosine similarity
+        cosine = (matrix[start:end] @ matrix[i].T).toarray().ravel()
+        
+        # Raw cosines sit in a narrow low band; scale by the sub-question's
+        # best match so relevance spans 0.4-1.0 like keyword scoring and
+        # still outweighs the domain bonus
+        best = cosine.max(initial=0.0)
+        if best > 0:
+            cosine = cosine / best
+        scores.append(0.4 + 0.6 * cosine)
+        start = end
+    
+    return scores
+
+
 # ==========================
 # DUCKDUCKGO FALLBACK SEARCH
 # ==========================
-async def duckduckgo_search(session: aiohttp.ClientSession, query: str, max_results: int = 10) -> List[Dict]:
+async def duckduckgo_search(client: httpx.AsyncClient, query: str, max_results: int = 10) -> List[SearchResult]:
     """Fallback search using DuckDuckGo HTML"""
     try:
         encoded = quote(query)
         url = f"https://html.duckduckgo.com/html/?q={encoded}"
         
-        async with session.get(url, headers=HEADERS, timeout=10) as resp:
-            if resp.status != 200:
-                return []
-            html = await resp.text()
+        status, html = await request_with_retries(
+            client, "GET", url, lambda resp: resp.text, headers=HEADERS, timeout=DDG_TIMEOUT
+        )
+        if status != 200:
+            return []
         
         soup = BeautifulSoup(html, "html.parser")
         results = []
@@ -96,26 +305,30 @@ async def duckduckgo_search(session: aiohttp.ClientSession, query: str, max_resu
             if href.startswith("//duckduckgo.com/l/?"):
                 continue
             
-            results.append({
-                "url": href,
-                "title": title,
-                "snippet": snippet,
-                "engine": "duckduckgo",
-                "date": None
-            })
+            results.append(SearchResult(
+                url=href,
+                title=title,
+                snippet=snippet,
+                engine="duckduckgo"
+            ))
         
         return results
     
     except Exception as e:
-        print(f"DuckDuckGo search failed for '{query}': {e}")
+        logger.warning("DuckDuckGo search failed for '%s': %s", query, e)
         return []
 
 
 # ==========================
 # TAVILY PRIMARY SEARCH
 # ==========================
-async def tavily_search(session: aiohttp.ClientSession, query: str, max_results: int = 10) -> Optional[List[Dict]]:
-    """Primary search using Tavily API"""
+async def tavily_search(client: httpx.AsyncClient, query: str, max_results: int = 10) -> Tuple[List[SearchResult], str]:
+    """
+    Primary search using Tavily API
+    
+    Returns (results, status) with status "ok" (possibly zero results),
+    "rate_limited" or "error"
+    """
     payload = {
         "api_key": TAVILY_API_KEY,
         "query": query,
@@ -125,46 +338,94 @@ async def tavily_search(session: aiohttp.ClientSession, query: str, max_results:
     }
     
     try:
-        async with session.post(TAVILY_URL, json=payload, headers=HEADERS, timeout=15) as resp:
-            if resp.status != 200:
-                print(f"Tavily API error: {resp.status}")
-                return None
-            
-            data = await resp.json()
+        status, data = await request_with_retries(
+            client, "POST", TAVILY_URL, response_json, json=payload, headers=HEADERS, timeout=TAVILY_TIMEOUT
+        )
+        if status == 429:
+            logger.warning("Tavily rate limited: %s", status)
+            return [], "rate_limited"
+        if status != 200:
+            logger.warning("Tavily API error: %s", status)
+            return [], "error"
         
         results = []
         for item in data.get("results", []):
-            results.append({
-                "url": item.get("url", ""),
-                "title": item.get("title", ""),
-                "snippet": item.get("content", ""),
-                "engine": "tavily",
-                "date": item.get("published_date")
-            })
+            results.append(SearchResult(
+                url=item.get("url", ""),
+                title=item.get("title", ""),
+                snippet=item.get("content", ""),
+                engine="tavily",
+                date=item.get("published_date")
+            ))
         
-        return results
+        return results, "ok"
     
     except Exception as e:
-        print(f"Tavily search failed for '{query}': {e}")
-        return None
+        logger.warning("Tavily search failed for '%s': %s", query, e)
+        return [], "error"
 
 
 # ==========================
 # MAIN SEARCHER FUNCTION
 # ==========================
-async def run_searcher_for_subquestion(subq_id: str, subq_text: str, search_plan: Dict) -> Dict:
+async def _search_with_fallback(client: httpx.AsyncClient, query: str, query_result: Dict) -> Tuple[Dict, List[SearchResult]]:
+    """Tavily, then DuckDuckGo; fills in query_result and returns it with the results"""
+    # Try Tavily first
+    tavily_results, tavily_status = await tavily_search(client, query, max_results=10)
+    
+    if tavily_status == "ok":
+        query_result["source"] = "tavily"
+        query_result["results_count"] = len(tavily_results)
+        query_result["status"] = "success"
+        logger.info("    ✓ Tavily: %d results", len(tavily_results))
+        return query_result, tavily_results
+    
+    # Fallback to DuckDuckGo
+    ddg_results = await duckduckgo_search(client, query, max_results=10)
+    query_result["source"] = "duckduckgo"
+    query_result["results_count"] = len(ddg_results)
+    query_result["status"] = "success" if ddg_results else "failed"
+    logger.info("    ⚠ DuckDuckGo fallback: %d results", len(ddg_results))
+    return query_result, ddg_results
+
+
+async def _run_one(client: httpx.AsyncClient, query: str, sem: asyncio.Semaphore) -> Tuple[Dict, List[SearchResult]]:
     """
-    Execute searches for a single sub-question
+    Run one query (Tavily, then DuckDuckGo fallback); returns its log entry and results
     
-    Args:
-        subq_id: Sub-question identifier
-        subq_text: The actual sub-question text (for better relevance scoring)
-        search_plan: Search strategy from the plan
+    DuckDuckGo is only tried when Tavily errors or is rate limited: a
+    successful empty answer is accepted as is
     
-    Returns:
-        Dictionary with search results
+    The query gets QUERY_TIMEOUT seconds once it holds a concurrency slot
+    (time queued behind other queries does not count), enough for Tavily's
+    retries plus the DuckDuckGo fallback; on timeout it is logged as
+    "timeout" with no results.
+    
+    Never raises on search failures (both engines log and swallow them), so a
+    bad query cannot cancel the rest of the task group
     """
-    # Collect all queries
+    async with sem:
+        logger.info("  → Query: '%s'", query)
+        
+        query_result = {
+            "query": query,
+            "source": None,
+            "results_count": 0,
+            "status": "failed"
+        }
+        
+        try:
+            async with asyncio.timeout(QUERY_TIMEOUT):
+                return await _search_with_fallback(client, query, query_result)
+        except TimeoutError:
+            logger.warning("Query '%s' timed out after %.0fs", query, QUERY_TIMEOUT)
+            query_result["results_count"] = 0
+            query_result["status"] = "timeout"
+            return query_result, []
+
+
+def collect_queries(search_plan: Dict) -> List[str]:
+    """Queries plus variants from a sub-question's search strategy, deduplicated in order"""
     queries = search_plan.get("queries", []).copy()
     
     # Add variants if available
@@ -174,144 +435,273 @@ async def run_searcher_for_subquestion(subq_id: str, subq_text: str, search_plan
             queries.append(variants[variant_type])
     
     # Deduplicate while preserving order
-    queries = list(dict.fromkeys(queries))
-    
-    print(f"\n[{subq_id}] Executing {len(queries)} queries...")
-    
-    all_results = []
-    queries_executed = []
-    
-    async with aiohttp.ClientSession() as session:
-        for query in queries:
-            print(f"  → Query: '{query}'")
-            
-            query_result = {
-                "query": query,
-                "source": None,
-                "results_count": 0,
-                "status": "failed"
-            }
-            
-            # Try Tavily first
-            tavily_results = await tavily_search(session, query, max_results=10)
-            
-            if tavily_results:
-                all_results.extend(tavily_results)
-                query_result["source"] = "tavily"
-                query_result["results_count"] = len(tavily_results)
-                query_result["status"] = "success"
-                print(f"    ✓ Tavily: {len(tavily_results)} results")
-            else:
-                # Fallback to DuckDuckGo
-                ddg_results = await duckduckgo_search(session, query, max_results=10)
-                all_results.extend(ddg_results)
-                query_result["source"] = "duckduckgo"
-                query_result["results_count"] = len(ddg_results)
-                query_result["status"] = "success" if ddg_results else "failed"
-                print(f"    ⚠ DuckDuckGo fallback: {len(ddg_results)} results")
-            
-            queries_executed.append(query_result)
-            
-            # Small delay to be respectful
-            await asyncio.sleep(0.5)
-    
-    # Deduplicate by URL
+    return list(dict.fromkeys(queries))
+
+
+def dedupe_results(subq_id: str, all_results: List[SearchResult]) -> List[SearchResult]:
+    """
+    Deduplicate one sub-question's results by canonical URL (scheme, trailing
+    slash, query order and tracking parameters ignored), keeping query order
+    """
     seen_urls = set()
     unique_results = []
     
     for result in all_results:
-        url = result["url"]
-        if url and url not in seen_urls:
-            seen_urls.add(url)
-            unique_results.append(result)
-    
-    print(f"  → Total unique results: {len(unique_results)}")
-    
-    # Score and rank results
-    # Use the sub-question text for relevance scoring
-    scored_results = []
-    
-    for result in unique_results:
-        # Calculate relevance against sub-question
-        rel_score = relevance_score(
-            subq_text,
-            result["title"],
-            result["snippet"]
-        )
-        
-        # Add domain quality bonus
-        dom_score = domain_quality(result["url"])
-        
-        # Final score
-        final_score = rel_score + dom_score
-        
-        result["relevance_score"] = rel_score
-        result["domain_score"] = dom_score
-        result["rank_score"] = final_score
-        
-        scored_results.append(result)
+        url = result.url
+        if not url:
+            continue
+        try:
+            key = canonical_url(url)
+        except ValueError:  # malformed URL (bad port, broken IPv6 host): dedup on the raw string
+            key = url
+        if key not in seen_urls:
+            seen_urls.add(key)
+            # Copy: results of a shared query are also ranked for other sub-questions
+            unique_results.append(replace(result))
+    
+    logger.info("[%s] Total unique results: %d", subq_id, len(unique_results))
+    return unique_results
+
+
+def top_indices(scores, k: int = 10) -> List[int]:
+    """
+    Indices of the k highest scores, best first; equal scores keep input
+    order (same picks as a stable sort, without sorting everything)
+    """
+    n = len(scores)
+    if np is None:
+        return heapq.nlargest(k, range(n), key=scores.__getitem__)
+    
+    if n <= k:
+        return np.argsort(-scores, kind="stable").tolist()
+    
+    # Everything above the k-th largest score, then the earliest ties to fill k
+    kth = np.partition(scores, n - k)[n - k]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - len(above)]
+    top = np.concatenate((above, ties))
+    return top[np.lexsort((top, -scores[top]))].tolist()
+
+
+def rank_results(subq_text: str, unique_results: List[SearchResult], rel_scores=None) -> List[SearchResult]:
+    """
+    Score and rank one sub-question's deduplicated results
+    
+    Args:
+        subq_text: The actual sub-question text (for better relevance scoring)
+        unique_results: Deduplicated results
+        rel_scores: TF-IDF relevance per result (see rank_all); keyword
+            matching is used when None
     
-    # Sort by rank score
-    scored_results.sort(key=lambda x: x["rank_score"], reverse=True)
+    Returns:
+        Top 10 results, best first, with scores filled in
+    """
+    # Calculate relevance against sub-question
+    if rel_scores is None:
+        query_words = prep_query(subq_text)
+        rel_scores = [
+            relevance_score_prepped(query_words, result.title, result.snippet)
+            for result in unique_results
+        ]
+    
+    # Add domain quality bonus; final score per result, by index
+    if np is not None:
+        rel_scores = np.asarray(rel_scores, dtype=float)
+        dom_scores = np.fromiter(
+            (domain_quality(result.url) for result in unique_results),
+            dtype=float,
+            count=len(unique_results)
+        )
+        final_scores = rel_scores + dom_scores
+    else:
+        dom_scores = [domain_quality(result.url) for result in unique_results]
+        final_scores = [rel + dom for rel, dom in zip(rel_scores, dom_scores)]
+    
+    # Only the top 10 are touched; the rest are never annotated or copied
+    top_results = []
+    for i in top_indices(final_scores, 10):
+        result = unique_results[i]
+        result.relevance_score = float(rel_scores[i])
+        result.domain_score = float(dom_scores[i])
+        result.rank_score = float(final_scores[i])
+        top_results.append(result)
+    
+    return top_results
+
+
+def rank_all(subq_results: List[Dict]) -> List[Dict]:
+    """
+    Rank every complete sub-question's results in place, keeping its top 10;
+    a sub-question whose ranking fails becomes an error entry
     
-    # Take top 10
-    top_results = scored_results[:10]
+    Relevance for all sub-questions comes from a single TF-IDF fit, so the
+    vocabulary and IDF are computed once per run instead of once per
+    sub-question (and IDF reflects the whole candidate pool).
+    """
+    complete = [i for i, subq_result in enumerate(subq_results) if subq_result["status"] == "complete"]
+    try:
+        rel_scores = tfidf_relevance(
+            [subq_results[i]["sub_question_text"] for i in complete],
+            [subq_results[i]["results"] for i in complete]
+        )
+    except Exception as error:
+        logger.warning("TF-IDF scoring failed, using keyword relevance: %s", error)
+        rel_scores = None
+    
+    for n, i in enumerate(complete):
+        subq_result = subq_results[i]
+        try:
+            subq_result["results"] = rank_results(
+                subq_result["sub_question_text"],
+                subq_result["results"],
+                None if rel_scores is None else rel_scores[n]
+            )
+        
+        # Handle any exceptions: only this sub-question becomes an error entry
+        except Exception as error:
+            logger.error("Error in sub-question %s: %s", subq_result["sub_question_id"], error)
+            subq_results[i] = {
+                "sub_question_id": subq_result["sub_question_id"],
+                "status": "error",
+                "error": str(error)
+            }
     
-    return {
-        "sub_question_id": subq_id,
-        "sub_question_text": subq_text,
-        "queries_executed": queries_executed,
-        "total_results_found": len(unique_results),
-        "results": top_results,
-        "status": "complete"
-    }
+    return subq_results
 
 
 # ==========================
 # RUN MULTIPLE SUB-QUESTIONS
 # ==========================
-async def run_searcher_for_all(subquestions: List[Dict]) -> List[Dict]:
+async def _finish_subquestion(subq: Dict, query_tasks: List[asyncio.Task]) -> Dict:
+    """
+    Wait for one sub-question's query tasks (each bounded by QUERY_TIMEOUT
+    in _run_one) and deduplicate the results; failures become an error entry
+    
+    Ranking is left to rank_all, once every sub-question is in.
+    """
+    try:
+        # asyncio.wait never cancels the query tasks, which may be shared
+        # with other sub-questions
+        if query_tasks:
+            await asyncio.wait(query_tasks)
+        
+        outcomes = [task.result() for task in query_tasks]
+        queries_executed = [query_result for query_result, _ in outcomes]
+        all_results = [result for _, results in outcomes for result in results]
+        unique_results = dedupe_results(subq["id"], all_results)
+        return {
+            "sub_question_id": subq["id"],
+            "sub_question_text": subq["question"],
+            "queries_executed": queries_executed,
+            "total_results_found": len(unique_results),
+            "results": unique_results,
+            "status": "complete"
+        }
+    
+    # Handle any exceptions
+    except Exception as error:
+        logger.error("Error in sub-question %s: %s", subq["id"], error)
+        return {
+            "sub_question_id": subq["id"],
+            "status": "error",
+            "error": str(error)
+        }
+
+
+def schedule_searches(tg: asyncio.TaskGroup, subquestions: List[Dict], client: httpx.AsyncClient) -> List[asyncio.Task]:
     """
-    Execute searches for all sub-questions in parallel
+    Start every (sub-question, query) search in the task group under one
+    global semaphore
     
     Args:
+        tg: Task group owning every search task
         subquestions: List of sub-question dictionaries from the plan
+        client: HTTP client shared by every query in the run
     
     Returns:
-        List of search results for each sub-question
+        One task per sub-question, in plan order, resolving to its
+        deduplicated (not yet ranked) results
     """
-    tasks = []
+    # One semaphore for the whole run: request rate no longer depends on
+    # how queries happen to be split across sub-questions
+    sem = asyncio.Semaphore(SEARCH_CONCURRENCY)
     
+    # Identical queries from different sub-questions share one task,
+    # so each distinct query hits the network once per run
+    query_tasks: Dict[str, asyncio.Task] = {}
+    
+    subq_tasks = []
     for subq in subquestions:
-        subq_id = subq["id"]
-        subq_text = subq["question"]
-        search_plan = subq["search_strategy"]
-        
-        task = run_searcher_for_subquestion(subq_id, subq_text, search_plan)
-        tasks.append(task)
+        queries = collect_queries(subq["search_strategy"])
+        logger.info("[%s] Executing %d queries...", subq["id"], len(queries))
+        for query in queries:
+            if query not in query_tasks:
+                query_tasks[query] = tg.create_task(_run_one(client, query, sem))
+        subq_tasks.append(tg.create_task(
+            _finish_subquestion(subq, [query_tasks[query] for query in queries])
+        ))
     
-    # Execute all in parallel
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    return subq_tasks
+
+
+async def run_searcher_for_all(subquestions: List[Dict], client: httpx.AsyncClient) -> List[Dict]:
+    """
+    Execute every (sub-question, query) search and collect the ranked
+    results for all sub-questions
     
-    # Handle any exceptions
-    final_results = []
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            print(f"Error in sub-question {subquestions[i]['id']}: {result}")
-            final_results.append({
-                "sub_question_id": subquestions[i]["id"],
-                "status": "error",
-                "error": str(result)
-            })
-        else:
-            final_results.append(result)
+    Args:
+        subquestions: List of sub-question dictionaries from the plan
+        client: HTTP client shared by every query in the run
+    
+    Returns:
+        List of search results for each sub-question, in plan order
+    """
+    async with asyncio.TaskGroup() as tg:
+        subq_tasks = schedule_searches(tg, subquestions, client)
     
-    return final_results
+    return rank_all([task.result() for task in subq_tasks])
+
+
+def _dump_line(obj: Dict) -> bytes:
+    """Encode one object as a JSON Lines record"""
+    if orjson:
+        return orjson.dumps(obj) + b"\n"  # serializes SearchResult natively
+    return json.dumps(obj, default=asdict).encode() + b"\n"
+
+
+def summarize_result(subq_result: Dict) -> Dict:
+    """Copy of a sub-question result without the (heavy) snippets, for console output"""
+    if "results" not in subq_result:
+        return subq_result
+    return {
+        **subq_result,
+        "results": [
+            {key: value for key, value in asdict(result).items() if key != "snippet"}
+            for result in subq_result["results"]
+        ]
+    }
+
+
+def create_client() -> httpx.AsyncClient:
+    """
+    Client for a whole searcher run: keep-alive connections to Tavily and
+    DuckDuckGo are reused across every query instead of re-handshaking,
+    and with HTTP/2 (needs h2) concurrent Tavily queries share one connection
+    """
+    return httpx.AsyncClient(
+        http2=h2 is not None,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30),
+        timeout=15.0,
+        follow_redirects=True
+    )
 
 
 # ==========================
 # DEMO USAGE
 # ==========================
+_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.S)
+
+
 def clean_llm_json(llm_output: str) -> dict:
     """
     Clean LLM output that might have markdown code fences
@@ -323,21 +713,12 @@ def clean_llm_json(llm_output: str) -> dict:
     
     Or just plain JSON
     """
-    cleaned = llm_output.strip()
-    
-    # Remove markdown code fences
-    if cleaned.startswith("```json"):
-        cleaned = cleaned[7:]  # Remove ```json
-    elif cleaned.startswith("```"):
-        cleaned = cleaned[3:]   # Remove ```
-    
-    if cleaned.endswith("```"):
-        cleaned = cleaned[:-3]  # Remove trailing ```
-    
-    # Strip again after removing fences
-    cleaned = cleaned.strip()
+    # Remove markdown code fences (and surrounding whitespace) in one pass
+    cleaned = _FENCE.sub("", llm_output)
     
     # Parse JSON
+    if orjson:
+        return orjson.loads(cleaned)
     return json.loads(cleaned)
 
 
@@ -347,25 +728,38 @@ async def main():
     # Clean and parse the LLM output
     plan = clean_llm_json(plan_output)
     
-    print("✓ Plan loaded and parsed successfully")
-    print(f"  Found {len(plan['sub_questions'])} sub-questions")
+    logger.info("✓ Plan loaded and parsed successfully")
+    logger.info("  Found %d sub-questions", len(plan["sub_questions"]))
+    
+    # Run searcher for all sub-questions; ranking needs every sub-question's
+    # results (one TF-IDF fit), so the file is written once searching is done
+    logger.info("Starting searcher...")
+    async with create_client() as client:
+        subq_results = await run_searcher_for_all(plan["sub_questions"], client)
     
-    # Run searcher for all sub-questions
-    print("\nStarting searcher...")
-    results = await run_searcher_for_all(plan["sub_questions"])
+    # One JSON Lines record per sub-question
+    summary = []
+    with open("search_results.jsonl", "wb") as f:
+        for subq_result in subq_results:
+            f.write(_dump_line(subq_result))
+            summary.append(summarize_result(subq_result))
     
-    # Print results
+    # Print summary (snippets omitted; full results are in the file)
     print("\n" + "="*60)
     print("SEARCH RESULTS")
     print("="*60)
-    print(json.dumps(results, indent=2))
+    if orjson:
+        print(orjson.dumps(summary, option=orjson.OPT_INDENT_2).decode())
+    else:
+        print(json.dumps(summary, indent=2))
     
-    # Save to file
-    with open("search_results.json", "w") as f:
-        json.dump(results, f, indent=2)
-    
-    print("\n✓ Results saved to search_results.json")
+    logger.info("✓ Results saved to search_results.jsonl")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    listener = setup_logging()
+    try:
+        run = uvloop.run if uvloop else asyncio.run
+        run(main())
+    finally:
+        listener.stop()